@@ -1,99 +1,346 @@
 import asyncio
 import datetime
-import functools
-import json
+import random
+import sqlite3
 import time
+from collections import deque
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, OrderedDict
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
 
 import httpx
-import pyexcel  # type: ignore
+import orjson
+import xlsxwriter  # type: ignore
 from solana.rpc.async_api import AsyncClient
 from solana.rpc.types import RPCResponse
 
 # Where the Solana goes
 METAVERSE_WALLET_ADDRESS = "Fwdp7bSAA1G4EsDn6DCkAuKSBRAJp7BjHutQptzQtzUG"
 
-ONE_SOL_IN_LAMPERTS = 1_000_000_000  # Solana's version of Bitcoin's "Satoshi"
+ONE_SOL_IN_LAMPORTS = 1_000_000_000  # Solana's version of Bitcoin's "Satoshi"
+
+# Solana's rate limit: 100 requests every 10 seconds.
+# every transaction in a batch request counts as a request of its own
+RATE_LIMIT_REQUESTS = 100
+RATE_LIMIT_PERIOD = 10
+
+# how many transactions we ask for in a single JSON-RPC batch request
+BATCH_SIZE = 20
+
+# how long (in seconds) we keep retrying a request that got ratelimited before giving up.
+# we pace ourselves to stay within the rate limit, so this only has to cover
+# the odd 429 we get anyway, not the whole queue of requests
+MAX_RETRY_WAIT = 60
+
+SPREADSHEET_FILE = "Metaverse_Purchases.xlsx"
+
+# the columns of our spreadsheet, in the order iter_sheet_rows fills them in
+SHEET_HEADER = [
+    "Timestamp",
+    "Buyer",
+    "Tokens Bought",
+    "Buyer's Token Count",
+    "$SOL Spent",
+    "Txn Signature",
+]
+
+CACHE_FILE = "cache.db"
+
+# where older versions cached transactions, one JSON file each
+LEGACY_SIGNATURE_FOLDER = Path("./signatures")
+
+# our local cache of transactions, one row per signature
+cache = sqlite3.connect(CACHE_FILE)
+cache.execute("PRAGMA journal_mode=WAL")
+cache.execute(
+    "CREATE TABLE IF NOT EXISTS transactions (signature TEXT PRIMARY KEY, data BLOB)"
+)
+# every signature seen by a completed run, in the order they happened (oldest first)
+cache.execute("CREATE TABLE IF NOT EXISTS signatures (signature TEXT PRIMARY KEY)")
+# the handful of values we actually use from each transaction, pulled out when it's
+# cached, so building the spreadsheet never has to parse the transaction data again
+cache.execute(
+    """CREATE TABLE IF NOT EXISTS purchases (
+        signature TEXT PRIMARY KEY,
+        is_purchase INTEGER NOT NULL,
+        block_time INTEGER,
+        buyer TEXT,
+        tokens_bought INTEGER,
+        token_count INTEGER,
+        lamports_spent INTEGER
+    )"""
+)
+
+
+class RateLimiter:
+    """Paces our requests so we stay within Solana's rate limit,
+    rather than sending them all and finding out via HTTP Error 429."""
+
+    def __init__(
+        self, requests: int = RATE_LIMIT_REQUESTS, period: float = RATE_LIMIT_PERIOD
+    ) -> None:
+        self.requests = requests
+        self.period = period
+        self.lock = asyncio.Lock()
+        # when each of the requests we sent in the last `period` seconds went out
+        self.sent: Deque[float] = deque()
+
+    async def wait(self, requests: int = 1) -> None:
+        """Waits until we can send `requests` more requests, and counts them as sent."""
+
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                while self.sent and self.sent[0] <= now - self.period:
+                    self.sent.popleft()
+
+                excess = len(self.sent) + requests - self.requests
+                if excess <= 0:
+                    break
+
+                # wait for enough of the older requests to fall out of the window
+                await asyncio.sleep(self.sent[excess - 1] + self.period - now)
+
+            self.sent.extend([now] * requests)
+
+
+T = TypeVar("T")
+
+
+async def retry_ratelimited(
+    request: Callable[[], Awaitable[T]], limiter: RateLimiter, requests: int = 1
+) -> T:
+    """Awaits the request (which counts as `requests` requests towards the rate limit)
+    once the limiter lets us, retrying it if Solana ratelimits us anyway (HTTP Error 429)
+    or has a hiccup on its end (HTTP Error 5xx)."""
+
+    attempt = 0
+    waited = 0.0
+    while True:
+        await limiter.wait(requests)
+        try:
+            return await request()
+        except httpx.HTTPStatusError as exc:
+            status = exc.response.status_code
+            if (status != 429 and status < 500) or waited >= MAX_RETRY_WAIT:
+                raise
+
+            # Solana tells us how long to wait via Retry-After.
+            # If it doesn't, we back off exponentially, up to a whole rate limit window.
+            try:
+                delay = float(exc.response.headers["Retry-After"])
+            except (KeyError, ValueError):
+                delay = min(2**attempt, RATE_LIMIT_PERIOD)
+
+            # with some jitter, so concurrent requests don't all come back at once,
+            # but never past the time we have left (Retry-After could be an hour)
+            delay = min(delay + random.uniform(0, 0.5), MAX_RETRY_WAIT - waited)
+            await asyncio.sleep(delay)
+            waited += delay
+            attempt += 1
 
-SIGNATURE_FOLDER = Path("./signatures")
 
-if SIGNATURE_FOLDER.exists() is False:
-    SIGNATURE_FOLDER.mkdir()
+def is_cached(signature: str) -> bool:
+    """Returns whether or not a transaction of a given signature has been cached."""
 
+    row = cache.execute(
+        "SELECT 1 FROM transactions WHERE signature = ?", (signature,)
+    ).fetchone()
+    return row is not None
 
-def json_file(signature: str) -> Path:
-    """Returns the Path object for a transaction of a given signature."""
-    return SIGNATURE_FOLDER / (signature + ".json")
 
+def get_cached_signatures() -> Set[str]:
+    """Returns the signatures of every transaction we have cached, in one query."""
 
-def run_in_executor(func: Callable[..., Any]):
-    """Turns blocking functions into async ones, in one line. (with decorator)"""
+    rows = cache.execute("SELECT signature FROM transactions")
+    return {signature for (signature,) in rows}
 
-    @functools.wraps(func)
-    async def wrapped(*args: Any, **kwargs: Any) -> Any:
-        return await asyncio.get_event_loop().run_in_executor(
-            None, functools.partial(func, *args, **kwargs)
-        )
 
-    return wrapped
+def get_uncached_signatures() -> List[str]:
+    """Returns the signatures remembered from previous runs whose transactions
+    we still don't have, like ones that failed to fetch last time."""
 
+    rows = cache.execute(
+        """SELECT signature FROM signatures
+        WHERE signature NOT IN (SELECT signature FROM transactions)"""
+    )
+    return [signature for (signature,) in rows]
 
-@run_in_executor
-def is_cached(signature: str) -> bool:
-    """Returns whether or not a transaction of a given signature has been cached."""
 
-    return json_file(signature).exists()
+def get_checkpoint() -> Optional[str]:
+    """Returns the newest signature remembered from previous runs, if any."""
+
+    row = cache.execute(
+        "SELECT signature FROM signatures ORDER BY rowid DESC LIMIT 1"
+    ).fetchone()
+    return row[0] if row else None
+
+
+def save_signatures(signatures: List[str]) -> None:
+    """Remembers newly seen signatures (given newest first), so the next run can
+    stop paginating once it reaches them."""
+
+    with cache:
+        cache.executemany(
+            "INSERT OR IGNORE INTO signatures (signature) VALUES (?)",
+            ((signature,) for signature in reversed(signatures)),
+        )
 
 
-@run_in_executor
 def get_transaction(signature: str) -> RPCResponse:
     """Returns the transaction data of a given signature."""
 
-    with open(json_file(signature), "r") as f:
-        return json.loads(f.read())
+    (data,) = cache.execute(
+        "SELECT data FROM transactions WHERE signature = ?", (signature,)
+    ).fetchone()
+    return orjson.loads(data)
 
 
-@run_in_executor
 def cache_transaction(signature: str, data: RPCResponse) -> None:
     """Write the transaction data to our local cache."""
 
-    with open(json_file(signature), "w") as f:
-        f.write(json.dumps(data, indent=4))  # pretty printed
+    cache_transactions({signature: data})
 
 
-async def fetch_transaction(client: AsyncClient, signature: str) -> RPCResponse:
-    """Will fetch the transaction data from Solana, cache it, and then return the data"""
+def cache_transactions(transactions: Dict[str, RPCResponse]) -> None:
+    """Write the data of many transactions to our local cache, in one database transaction."""
+
+    with cache:
+        cache.executemany(
+            "INSERT OR IGNORE INTO transactions (signature, data) VALUES (?, ?)",
+            # compact JSON: it's read by machines, so there's no need to pretty print it
+            (
+                (signature, orjson.dumps(data))
+                for signature, data in transactions.items()
+            ),
+        )
+
+    # the raw data is committed on its own first,
+    # so it's kept no matter what we make of it here
+    with cache:
+        cache.executemany(
+            "INSERT OR IGNORE INTO purchases VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (signature, *project_transaction(data))
+                for signature, data in transactions.items()
+            ),
+        )
 
-    try:
-        transaction = await client.get_confirmed_transaction(signature)
-    except httpx.HTTPStatusError:
-        # probably a ratelimit error (HTTP Error 429)
-        # Solana has a rate limit of 10s per 100 requests.
-        # So, let's wait 11 seconds just to be sure,
-        # and then do it again
 
-        await asyncio.sleep(11)
-        transaction = await client.get_confirmed_transaction(signature)
+async def fetch_transaction(
+    client: AsyncClient, signature: str, limiter: RateLimiter
+) -> RPCResponse:
+    """Will fetch the transaction data from Solana, cache it, and then return the data"""
 
-    await cache_transaction(signature, transaction)
+    transaction = await retry_ratelimited(
+        lambda: client.get_confirmed_transaction(signature), limiter
+    )
+
+    cache_transaction(signature, transaction)
 
     return transaction
 
 
-async def fetch_all_signatures(client: AsyncClient) -> List[str]:
-    """Grabs all signatures of transactions that includes the Metaverse Wallet's address.
-    If the Metaverse address was at all in a transaction, it will be here.
+def chunks(items: List[str], size: int) -> Iterator[List[str]]:
+    """Yields successive lists of (at most) `size` items."""
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+async def post_batch(client: AsyncClient, signatures: List[str]) -> List[RPCResponse]:
+    """Sends one JSON-RPC batch request asking for the transactions of all given signatures."""
+
+    payload = [
+        {
+            "jsonrpc": "2.0",
+            "id": i,
+            "method": "getConfirmedTransaction",
+            "params": [signature, "json"],
+        }
+        for i, signature in enumerate(signatures)
+    ]
+
+    # the solana client doesn't do batch requests, so we borrow its http session
+    provider = client._provider  # type: ignore
+    response = await provider.session.post(provider.endpoint_uri, json=payload)
+    response.raise_for_status()
+
+    body = orjson.loads(response.content)
+    if not isinstance(body, list):
+        # a rejected batch gets a single error object back instead of a list
+        raise RuntimeError(f"Solana rejected our batch request: {body}")
+
+    return body
+
+
+async def fetch_transactions_batch(
+    client: AsyncClient,
+    signatures: List[str],
+    limiter: RateLimiter,
+) -> List[str]:
+    """Will fetch the transaction data of many signatures from Solana in a single request,
+    and cache them. Returns the signatures whose transactions we didn't get."""
+
+    try:
+        # the limiter decides when each batch goes out,
+        # so there's no need to cap how many are in flight on top of that
+        responses = await retry_ratelimited(
+            lambda: post_batch(client, signatures), limiter, requests=len(signatures)
+        )
+    except (httpx.HTTPStatusError, httpx.TransportError, RuntimeError):
+        # one bad batch shouldn't take the rest of the run down with it.
+        # its signatures get picked up again by the next run
+        return signatures
+
+    # batch responses can come back in any order, so we match them up by id.
+    # a response may also be an error, or have a null result if the transaction
+    # isn't available yet. we only cache the ones that actually came through.
+    transactions = {
+        signatures[response["id"]]: response
+        for response in responses
+        if response.get("result") is not None
+    }
+
+    cache_transactions(transactions)
+
+    return [signature for signature in signatures if signature not in transactions]
+
+
+async def iter_signature_pages(
+    client: AsyncClient, limiter: RateLimiter, until: Optional[str] = None
+) -> AsyncIterator[List[str]]:
+    """Yields the signatures of transactions that include the Metaverse Wallet's address,
+    one page at a time, newest first. Each page is handed over as soon as it arrives,
+    so callers can get to work on it while we fetch the next one.
+
+    If `until` is given, Solana stops the pagination for us once it reaches that
+    signature (which is not included), since everything from there on has been seen before.
     """
 
     # the "before" variable will be our makeshift pagination through all of the transactions
     before: Optional[str] = None
 
-    signatures: List[str] = []
-
     while True:
-        data = await client.get_signatures_for_address(
-            METAVERSE_WALLET_ADDRESS, before=before
+        data = await retry_ratelimited(
+            lambda: client.get_signatures_for_address(
+                METAVERSE_WALLET_ADDRESS,
+                before=before,
+                until=until,
+            ),
+            limiter,
         )
 
         result = data["result"]  # type: ignore
@@ -101,116 +348,252 @@ async def fetch_all_signatures(client: AsyncClient) -> List[str]:
             # we hit the end!
             break
 
-        for transaction in result:
-            signatures.append(transaction["signature"])
+        page = [transaction["signature"] for transaction in result]
+        yield page
 
-        before = signatures[-1]
+        before = page[-1]
+
+
+async def fetch_all_signatures(client: AsyncClient) -> List[str]:
+    """Grabs all signatures of transactions that includes the Metaverse Wallet's address.
+    If the Metaverse address was at all in a transaction, it will be here.
+    """
+
+    signatures: List[str] = []
+
+    async for page in iter_signature_pages(client, RateLimiter()):
+        signatures.extend(page)
 
     return signatures
 
 
-@run_in_executor
-def export_to_spreadsheet(data: List[Dict[str, Any]]) -> None:
-    pyexcel.save_as(records=data, dest_file_name="Metaverse_Purchases.xls")  # type: ignore
+def token_amount(token_balance: Dict[str, Any]) -> int:
+    """Returns how many tokens a token balance holds. uiAmount is already a number
+    (or null, when the balance is empty), so there's no need to parse uiAmountString."""
 
+    return int(token_balance["uiTokenAmount"]["uiAmount"] or 0)
 
-async def main() -> None:
-    async with AsyncClient("https://api.mainnet-beta.solana.com") as client:
 
-        # first, cache all of the signatures locally
-        signatures = await fetch_all_signatures(client=client)
-        newly_cached = 0
-        start_time = time.monotonic()
-        for signature in signatures:
-            # let's not waste I/O on re-caching
-            cached = await is_cached(signature=signature)
-            if not cached:
-                await fetch_transaction(client=client, signature=signature)
-                newly_cached += 1
+def import_legacy_cache() -> int:
+    """Moves any transactions cached by older versions (in LEGACY_SIGNATURE_FOLDER)
+    that we don't have yet into our database, and returns how many there were."""
 
-    if newly_cached:
-        end_time = time.monotonic()
+    if not LEGACY_SIGNATURE_FOLDER.exists():
+        return 0
 
-        print(
-            f"New Transactions cached: {newly_cached:,} (Took {end_time - start_time} seconds)"
-        )
+    cached_signatures = get_cached_signatures()
+    transactions: Dict[str, RPCResponse] = {}
+    for path in LEGACY_SIGNATURE_FOLDER.glob("*.json"):
+        if path.stem in cached_signatures:
+            continue
 
-    # create spreadsheet
-    sheet_data: List[Dict[str, Any]] = []
-    for signature in signatures[::-1]:  # start from the oldest signature
-        transaction = await get_transaction(signature)
+        data = orjson.loads(path.read_bytes())
+        if data.get("result") is not None:
+            transactions[path.stem] = data
 
-        # first, we gather the interesting parts of the data
+    cache_transactions(transactions)
 
-        # the payload
-        result: Dict[str, Any] = transaction["result"]
+    return len(transactions)
 
-        # metadata of the transaction (the good stuff)
-        meta: Dict[str, Any] = result["meta"]
 
-        # let's skip any errored transactions
-        if meta["err"] is not None:
-            continue
+def project_transaction(transaction: RPCResponse) -> Tuple[Any, ...]:
+    """Pulls the values we care about out of a purchase's transaction data, in the
+    column order of the purchases table (minus the signature). Transactions that
+    aren't successful purchases are marked as such, with no values."""
 
-        # unix timestamp of the block's confirmation
-        block_time: int = result["blockTime"]
+    not_a_purchase = (False, None, None, None, None, None)
 
-        # metadata of the transaction (the good stuff)
-        meta: Dict[str, Any] = result["meta"]
+    # first, we gather the interesting parts of the data
 
-        # post-transaction token balances
-        post_token_balances: List[Dict[str, Any]] = meta["postTokenBalances"]
+    # the payload
+    result: Dict[str, Any] = transaction["result"]
 
-        # pre-transaction token balances
-        # if the buyer has never purchased this token before, it will be an empty list
-        pre_token_balances: List[Dict[str, Any]] = meta["preTokenBalances"]
+    # metadata of the transaction (the good stuff)
+    meta: Dict[str, Any] = result["meta"]
 
-        # all addresses involved in the transaction
-        account_keys: List[str] = result["transaction"]["message"]["accountKeys"]
+    # let's skip any errored transactions
+    if meta["err"] is not None:
+        return not_a_purchase
 
-        # the address of the account doing the purchase
-        purchaser_address = account_keys[0]
+    # unix timestamp of the block's confirmation
+    block_time: int = result["blockTime"]
 
-        # the index of the metaverse wallet in this transaction, to track the income
-        metaverse_wallet_index = account_keys.index(METAVERSE_WALLET_ADDRESS)
+    # post-transaction token balances
+    post_token_balances: List[Dict[str, Any]] = meta["postTokenBalances"]
 
-        # a list of the balances of the addresses involved in the transaction, before the transaction goes through
-        pre_txn_balances: List[int] = meta["preBalances"]
+    # pre-transaction token balances
+    # if the buyer has never purchased this token before, it will be an empty list
+    pre_token_balances: List[Dict[str, Any]] = meta["preTokenBalances"]
 
-        # a list of the balances of the addresses involved in the transaction, after the transaction goes through
-        post_txn_balances: List[int] = meta["postBalances"]
+    # all addresses involved in the transaction
+    account_keys: List[str] = result["transaction"]["message"]["accountKeys"]
 
-        ##########
+    # no tokens changed hands (like a withdrawal from the wallet), so it's not a purchase
+    if not post_token_balances or METAVERSE_WALLET_ADDRESS not in account_keys:
+        return not_a_purchase
 
-        # add to sheet data
-        data: OrderedDict[str, Any] = OrderedDict({})
-        data["Timestamp"] = datetime.datetime.fromtimestamp(block_time)
-        data["Buyer"] = purchaser_address
+    # the address of the account doing the purchase
+    purchaser_address = account_keys[0]
+
+    # the index of the metaverse wallet in this transaction, to track the income
+    metaverse_wallet_index = account_keys.index(METAVERSE_WALLET_ADDRESS)
+
+    # a list of the balances of the addresses involved in the transaction, before the transaction goes through
+    pre_txn_balances: List[int] = meta["preBalances"]
+
+    # a list of the balances of the addresses involved in the transaction, after the transaction goes through
+    post_txn_balances: List[int] = meta["postBalances"]
+
+    ##########
+
+    post_token_balance = token_amount(post_token_balances[0])
+    if len(pre_token_balances):
+        before = token_amount(pre_token_balances[0])
+        bought = post_token_balance - before
+    else:
+        bought = post_token_balance
+
+    lamports_spent = (
+        post_txn_balances[metaverse_wallet_index]
+        - pre_txn_balances[metaverse_wallet_index]
+    )
+
+    return (
+        True,
+        block_time,
+        purchaser_address,
+        bought,
+        post_token_balance,
+        lamports_spent,
+    )
+
+
+def iter_sheet_rows() -> Iterator[List[Any]]:
+    """Yields the spreadsheet rows (see SHEET_HEADER) of every successful purchase
+    we know of, starting from the oldest."""
+
+    rows = cache.execute(
+        """SELECT block_time, buyer, tokens_bought, token_count, lamports_spent,
+            signature
+        FROM signatures JOIN purchases USING (signature)
+        WHERE is_purchase
+        ORDER BY signatures.rowid"""
+    )
+
+    for block_time, buyer, bought, token_count, lamports_spent, signature in rows:
+        yield [
+            datetime.datetime.fromtimestamp(block_time),
+            buyer,
+            bought,
+            token_count,
+            lamports_spent / ONE_SOL_IN_LAMPORTS,
+            signature,
+        ]
 
-        bought = 0
-        post_token_balance = int(
-            post_token_balances[0]["uiTokenAmount"]["uiAmountString"]
-        )
-        if len(pre_token_balances):
-            before = int(pre_token_balances[0]["uiTokenAmount"]["uiAmountString"])
-            bought = post_token_balance - before
-        else:
-            bought = post_token_balance
 
-        data["Tokens Bought"] = bought
+def export_to_spreadsheet(header: List[str], rows: Iterable[List[Any]]) -> None:
+    """Writes the header and then the rows out to our spreadsheet, as the rows come in."""
 
-        data["Buyer's Token Count"] = post_token_balance
+    # constant_memory flushes each row to disk as soon as we move on to the next one,
+    # so no matter how many rows there are, we only ever hold one of them
+    workbook = xlsxwriter.Workbook(
+        SPREADSHEET_FILE,
+        {"constant_memory": True, "default_date_format": "yyyy-mm-dd hh:mm:ss"},
+    )
+    worksheet = workbook.add_worksheet()
 
-        data["$SOL Spent"] = (
-            post_txn_balances[metaverse_wallet_index]
-            - pre_txn_balances[metaverse_wallet_index]
-        ) / ONE_SOL_IN_LAMPERTS
+    worksheet.write_row(0, 0, header)
+    for row_number, row in enumerate(rows, start=1):
+        worksheet.write_row(row_number, 0, row)
 
-        data["Txn Signature"] = signature
+    workbook.close()
 
-        sheet_data.append(data)
 
-    await export_to_spreadsheet(sheet_data)
+async def main() -> None:
+    imported = import_legacy_cache()
+    if imported:
+        print(f"Imported {imported:,} transactions from {LEGACY_SIGNATURE_FOLDER}")
+
+    async with AsyncClient("https://api.mainnet-beta.solana.com") as client:
+
+        # first, cache all of the signatures locally
+        start_time = time.monotonic()
+
+        # let's not waste I/O on re-caching
+        cached_signatures = get_cached_signatures()
+
+        # no need to paginate through what previous runs already found
+        checkpoint = get_checkpoint()
+
+        limiter = RateLimiter()
+        new_signatures: List[str] = []
+        fetches: List["asyncio.Task[List[str]]"] = []
+        newly_cached = 0
+
+        def fetch(signatures: List[str]) -> None:
+            nonlocal newly_cached
+            newly_cached += len(signatures)
+
+            for chunk in chunks(signatures, BATCH_SIZE):
+                fetches.append(
+                    asyncio.create_task(
+                        fetch_transactions_batch(
+                            client=client,
+                            signatures=chunk,
+                            limiter=limiter,
+                        )
+                    )
+                )
+
+        try:
+            # pick up anything previous runs couldn't fetch
+            fetch(get_uncached_signatures())
+
+            async for page in iter_signature_pages(
+                client=client, limiter=limiter, until=checkpoint
+            ):
+                new_signatures.extend(page)
+
+                # start fetching this page's transactions while we paginate onwards
+                fetch(
+                    [
+                        signature
+                        for signature in page
+                        if signature not in cached_signatures
+                    ]
+                )
+
+            failed = [
+                signature
+                for missing in await asyncio.gather(*fetches)
+                for signature in missing
+            ]
+        finally:
+            # if anything went wrong, don't leave fetches running on a closed client
+            for task in fetches:
+                task.cancel()
+            await asyncio.gather(*fetches, return_exceptions=True)
+
+        newly_cached -= len(failed)
+
+        # only remember these once all of their fetches are done.
+        # anything that failed is picked up again by the next run
+        save_signatures(new_signatures)
+
+    if failed:
+        print(
+            f"Couldn't fetch {len(failed):,} transactions, they'll be retried next run"
+        )
+
+    if newly_cached:
+        end_time = time.monotonic()
+
+        print(
+            f"New Transactions cached: {newly_cached:,} (Took {end_time - start_time} seconds)"
+        )
+
+    # create spreadsheet
+    export_to_spreadsheet(SHEET_HEADER, iter_sheet_rows())
 
 
 if __name__ == "__main__":